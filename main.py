@@ -1,8 +1,17 @@
+import array
 import asyncio
+import collections
+import json
+import logging
+import logging.handlers
+import math
+import re
 import subprocess
 import signal
+import socket
 import sys
 import os
+import time
 import psutil
 from telegram import Update
 from telegram.ext import Application, CommandHandler, ContextTypes
@@ -12,10 +21,144 @@ BOT_TOKEN = "8252942642:AAEdq-4g81QlGK4vq5f-bFG09G-YzKPSf-U"
 OWNER_ID = 7324136492  # Your Telegram User ID
 USERBOT_SCRIPT = "user_bot.py"  # Your userbot script filename
 
+# ===== LOG CONFIGURATION =====
+MAX_LOG_LINES = 2000  # Lines of userbot output kept in memory
+LOG_TAIL_DEFAULT = 30  # Lines shown by /logs when no count is given
+LOG_FILE = "userbot.log"  # Set to None to keep logs in memory only
+LOG_FILE_MAX_BYTES = 5 * 1024 * 1024  # Rotate the log file at 5 MB
+LOG_FILE_BACKUPS = 3  # Number of rotated log files to keep
+TELEGRAM_MAX_MESSAGE = 4000  # Stay under Telegram's 4096 char limit
+
+# ===== SUPERVISOR CONFIGURATION =====
+USERBOT_HOST = "127.0.0.1"  # Where the userbot's HTTP server listens
+USERBOT_PORT = int(os.getenv("PORT", "8000"))  # Same PORT variable user_bot.py reads
+HEALTH_CHECK_PATH = "/ready"  # Endpoint probed for readiness and stats (503 until Telegram is connected)
+HEALTH_CHECK_INTERVAL = 10  # Seconds between health probes
+HEALTH_CHECK_TIMEOUT = 5  # Seconds before a probe counts as failed
+HEALTH_MAX_FAILURES = 3  # Consecutive failed probes before the userbot is treated as hung
+HEALTH_STARTUP_GRACE = 60  # Seconds after launch during which failed probes are ignored
+RESTART_BACKOFF_BASE = 2  # First auto-restart delay in seconds (doubles each attempt)
+RESTART_BACKOFF_MAX = 300  # Upper bound for the auto-restart delay
+BACKOFF_RESET_AFTER = 300  # Seconds of healthy uptime before the backoff resets
+USERBOT_DRAIN_TIMEOUT = 30  # Seconds in-flight streams get to finish on stop/restart
+USERBOT_STOP_TIMEOUT = 10  # Extra seconds after the drain before force-killing
+USERBOT_HANDOFF = hasattr(socket, "SO_REUSEPORT")  # Overlap old and new userbot on restart
+HANDOFF_READY_TIMEOUT = 60  # Seconds the new userbot gets to start listening before a hand-off is aborted
+
+# ===== METRICS & ALERT CONFIGURATION =====
+SAMPLE_INTERVAL = 1  # Seconds between resource samples
+METRICS_HISTORY_SECONDS = 2 * 60 * 60  # History kept in the ring buffer (~350 KB)
+STATS_DEFAULT_WINDOW = 15 * 60  # Window used by /stats when none is given
+ALERT_CPU_PERCENT = 95  # CPU % (of one core) treated as saturated
+ALERT_CPU_SUSTAINED = 60  # Seconds of saturated CPU before alerting
+ALERT_RSS_MB = 1024  # Absolute RSS alert threshold
+ALERT_RSS_GROWTH_MB = 256  # RSS growth that suggests a leak...
+ALERT_RSS_GROWTH_WINDOW = 30 * 60  # ...within this many seconds
+ALERT_LOOP_LAG_MS = 500  # Userbot event-loop lag alert threshold
+ALERT_FDS = 1000  # Open file descriptor / handle alert threshold
+ALERT_COOLDOWN = 15 * 60  # Seconds before the same alert is sent again
+
+# ===== METRICS HISTORY =====
+class MetricsRing:
+    """
+    Fixed-size time-series ring buffer backed by array.array.
+    One float32 column per metric plus a float64 timestamp column, so
+    hours of 1 s samples cost a few hundred KB and no per-sample objects.
+    Timestamps are time.monotonic() so clock steps can't break windows.
+    Missing values are stored as NaN and skipped when reading.
+    """
+    
+    def __init__(self, fields: tuple, capacity: int):
+        self.fields = tuple(fields)
+        self.capacity = capacity
+        self.times = array.array("d", [0.0]) * capacity
+        self.columns = {field: array.array("f", [math.nan]) * capacity for field in self.fields}
+        self.head = 0  # Next slot to write
+        self.count = 0
+    
+    def append(self, timestamp: float, values: dict):
+        """Record one sample; fields absent from `values` are stored as missing"""
+        i = self.head
+        self.times[i] = timestamp
+        for field, column in self.columns.items():
+            value = values.get(field)
+            column[i] = math.nan if value is None else value
+        self.head = (i + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+    
+    def window_indices(self, seconds: float) -> list[int]:
+        """Slot indices of samples within `seconds` of the newest one, oldest first"""
+        if self.count == 0:
+            return []
+        cutoff = self.times[(self.head - 1) % self.capacity] - seconds
+        indices = []
+        for k in range(1, self.count + 1):
+            i = (self.head - k) % self.capacity
+            if self.times[i] < cutoff:
+                break
+            indices.append(i)
+        indices.reverse()
+        return indices
+    
+    def window(self, field: str, seconds: float) -> list[float]:
+        """Non-missing values of `field` within the last `seconds`, oldest first"""
+        column = self.columns[field]
+        values = (column[i] for i in self.window_indices(seconds))
+        return [value for value in values if not math.isnan(value)]
+    
+    def latest(self, field: str):
+        """Most recent value of `field`, or None"""
+        if self.count == 0:
+            return None
+        value = self.columns[field][(self.head - 1) % self.capacity]
+        return None if math.isnan(value) else value
+    
+    @property
+    def nbytes(self) -> int:
+        """Memory used by the backing arrays"""
+        total = self.times.itemsize * self.capacity
+        for column in self.columns.values():
+            total += column.itemsize * self.capacity
+        return total
+
+# (field, label) pairs shown by /stats, in display order
+METRIC_FIELDS = (
+    ("cpu", "CPU %"),
+    ("rss_mb", "RSS MB"),
+    ("threads", "Threads"),
+    ("fds", "Open FDs"),
+    ("connections", "Conns"),
+    ("net_sent_kbps", "Net out KB/s"),
+    ("net_recv_kbps", "Net in KB/s"),
+    ("served_kbps", "Served KB/s"),
+    ("loop_lag_ms", "Loop lag ms"),
+    ("probe_ms", "Probe ms"),
+    ("active_streams", "Streams"),
+)
+
 # ===== GLOBAL VARIABLES =====
 userbot_process = None
-userbot_logs = []
-MAX_LOG_LINES = 50
+userbot_logs = collections.deque(maxlen=MAX_LOG_LINES)
+userbot_log_task = None
+userbot_file_log = None
+userbot_started_at = None
+userbot_ps = None  # Cached psutil.Process so cpu_percent() never has to sleep
+userbot_lock = asyncio.Lock()  # Serialises start/stop between commands and the supervisor
+userbot_history = MetricsRing(
+    (field for field, _ in METRIC_FIELDS),
+    METRICS_HISTORY_SECONDS // SAMPLE_INTERVAL
+)
+latest_probe = {}  # Last successful health probe: time, latency_ms, stats, pid, served_kbps, fresh
+startup_history = collections.deque(maxlen=20)  # Startup timings reported by recent launches
+net_io_prev = None  # (time, bytes_sent, bytes_recv) for network rate calculation
+alert_last_sent = {}  # Alert key -> monotonic time it was last sent
+sampler_task = None
+supervisor_task = None
+supervisor_enabled = False
+draining_processes = set()  # Old userbots finishing their streams after a hand-off
+restart_attempts = 0
+restart_count = 0
+last_restart = None  # (timestamp, reason) of the last automatic restart
 
 # ===== HELPER FUNCTIONS =====
 def is_owner(user_id: int) -> bool:
@@ -27,7 +170,87 @@ def is_userbot_running() -> bool:
     global userbot_process
     if userbot_process is None:
         return False
-    return userbot_process.poll() is None
+    return userbot_process.returncode is None
+
+def get_file_logger():
+    """Get the rotating on-disk logger for userbot output (None if disabled)"""
+    global userbot_file_log
+    if LOG_FILE is None:
+        return None
+    if userbot_file_log is None:
+        handler = logging.handlers.RotatingFileHandler(
+            LOG_FILE,
+            maxBytes=LOG_FILE_MAX_BYTES,
+            backupCount=LOG_FILE_BACKUPS,
+            encoding="utf-8"
+        )
+        handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+        userbot_file_log = logging.getLogger("userbot")
+        userbot_file_log.setLevel(logging.INFO)
+        userbot_file_log.propagate = False
+        userbot_file_log.addHandler(handler)
+    return userbot_file_log
+
+def record_log_line(line: str):
+    """Store one line of userbot output in the ring buffer (and on disk)"""
+    userbot_logs.append(line)
+    file_log = get_file_logger()
+    if file_log is not None:
+        try:
+            file_log.info(line)
+        except Exception:
+            pass
+
+async def pump_userbot_output(reader: asyncio.StreamReader):
+    """
+    Continuously drain the userbot's stdout/stderr pipe.
+    If nobody reads the pipe, the OS buffer fills up and every print()
+    in the userbot blocks, freezing its event loop and all streams.
+    """
+    while True:
+        try:
+            line = await reader.readline()
+        except ValueError:
+            # Line longer than the reader limit - it was discarded, keep going
+            record_log_line("[... overlong line truncated ...]")
+            continue
+        except Exception as e:
+            record_log_line(f"[log reader error: {e}]")
+            break
+        if not line:
+            break
+        record_log_line(line.decode("utf-8", errors="replace").rstrip("\r\n"))
+
+def get_recent_logs(count: int, pattern: str = None) -> list[str]:
+    """Return the last `count` buffered log lines, optionally filtered by a regex"""
+    lines = list(userbot_logs)
+    if pattern:
+        try:
+            regex = re.compile(pattern, re.IGNORECASE)
+        except re.error:
+            regex = re.compile(re.escape(pattern), re.IGNORECASE)
+        lines = [line for line in lines if regex.search(line)]
+    return lines[-count:] if count > 0 else []
+
+def get_userbot_uptime() -> float:
+    """Seconds since the current userbot process was launched"""
+    if userbot_started_at is None:
+        return 0.0
+    return time.monotonic() - userbot_started_at
+
+def get_ps_process():
+    """
+    Get a cached psutil handle for the userbot.
+    Reusing the same handle lets cpu_percent(interval=None) measure usage
+    since the previous call instead of sleeping inside the event loop.
+    """
+    global userbot_ps
+    if not is_userbot_running():
+        return None
+    if userbot_ps is None or userbot_ps.pid != userbot_process.pid:
+        userbot_ps = psutil.Process(userbot_process.pid)
+        userbot_ps.cpu_percent(interval=None)
+    return userbot_ps
 
 def get_process_info() -> dict:
     """Get userbot process information"""
@@ -35,10 +258,10 @@ def get_process_info() -> dict:
         return None
     
     try:
-        process = psutil.Process(userbot_process.pid)
+        process = get_ps_process()
         return {
             "pid": process.pid,
-            "cpu": f"{process.cpu_percent(interval=0.1):.1f}%",
+            "cpu": f"{userbot_history.latest('cpu') or 0.0:.1f}%",
             "memory": f"{process.memory_info().rss / 1024 / 1024:.1f} MB",
             "status": process.status(),
             "uptime": f"{(psutil.time.time() - process.create_time()) / 60:.1f} min"
@@ -46,9 +269,242 @@ def get_process_info() -> dict:
     except:
         return None
 
-async def start_userbot() -> tuple[bool, str]:
-    """Start the userbot script"""
-    global userbot_process, userbot_logs
+def sample_process_metrics() -> dict:
+    """Take one psutil sample of the userbot (blocking syscalls - run in a thread)"""
+    global net_io_prev
+    process = get_ps_process()
+    if process is None:
+        return None
+    try:
+        with process.oneshot():
+            sample = {
+                "cpu": process.cpu_percent(interval=None),
+                "rss_mb": process.memory_info().rss / 1024 / 1024,
+                "threads": process.num_threads(),
+                "fds": process.num_handles() if sys.platform == "win32" else process.num_fds(),
+            }
+        try:
+            net_connections = getattr(process, "net_connections", None) or process.connections
+            sample["connections"] = len(net_connections(kind="inet"))
+        except psutil.AccessDenied:
+            pass
+    except (psutil.NoSuchProcess, psutil.AccessDenied):
+        return None
+    
+    # psutil has no per-process network counters; use the host/container
+    # totals, which the userbot dominates when it is the only service
+    now = time.monotonic()
+    net = psutil.net_io_counters()
+    if net_io_prev is not None and now > net_io_prev[0]:
+        elapsed = now - net_io_prev[0]
+        sample["net_sent_kbps"] = (net.bytes_sent - net_io_prev[1]) / 1024 / elapsed
+        sample["net_recv_kbps"] = (net.bytes_recv - net_io_prev[2]) / 1024 / elapsed
+    net_io_prev = (now, net.bytes_sent, net.bytes_recv)
+    return sample
+
+async def probe_userbot_health() -> tuple[bool, float, dict]:
+    """
+    Probe the userbot's HTTP server.
+    Returns (healthy, latency in seconds, decoded JSON body or {}).
+    The body is decoded for error responses too, so callers can tell a
+    process that answers but isn't ready from one that doesn't answer at all.
+    """
+    started = time.monotonic()
+    writer = None
+    try:
+        reader, writer = await asyncio.wait_for(
+            asyncio.open_connection(USERBOT_HOST, USERBOT_PORT),
+            timeout=HEALTH_CHECK_TIMEOUT
+        )
+        writer.write(
+            f"GET {HEALTH_CHECK_PATH} HTTP/1.0\r\nHost: {USERBOT_HOST}\r\n\r\n".encode()
+        )
+        await writer.drain()
+        # HTTP/1.0: the server closes the connection after the response
+        raw = await asyncio.wait_for(reader.read(), timeout=HEALTH_CHECK_TIMEOUT)
+        latency = time.monotonic() - started
+        head, _, body = raw.partition(b"\r\n\r\n")
+        status_line = head.split(b"\r\n", 1)[0].split()
+        healthy = len(status_line) >= 2 and status_line[1] == b"200"
+        try:
+            payload = json.loads(body)
+        except ValueError:
+            payload = {}
+        return healthy, latency, payload if isinstance(payload, dict) else {}
+    except Exception:
+        return False, time.monotonic() - started, {}
+    finally:
+        if writer is not None:
+            writer.close()
+
+def percentile(values: list[float], pct: float) -> float:
+    """Nearest-rank percentile of a non-empty list"""
+    ordered = sorted(values)
+    rank = max(0, math.ceil(pct / 100 * len(ordered)) - 1)
+    return ordered[rank]
+
+def parse_window(text: str) -> int:
+    """Parse a window like '90s', '15m' or '2h' into seconds (None if invalid)"""
+    match = re.fullmatch(r"(\d+)([smh]?)", text.strip().lower())
+    if not match:
+        return None
+    return int(match.group(1)) * {"": 60, "s": 1, "m": 60, "h": 3600}[match.group(2)]
+
+def format_window(seconds: float) -> str:
+    """Human-readable window length"""
+    if seconds >= 3600:
+        return f"{seconds / 3600:g} h"
+    if seconds >= 60:
+        return f"{seconds / 60:g} min"
+    return f"{seconds:g} s"
+
+def summarise_metrics(seconds: float = 3600) -> str:
+    """Summarise recent resource history for /status"""
+    cpu = userbot_history.window("cpu", seconds)
+    if not cpu:
+        return "📈 **History:** no samples yet"
+    
+    rss = userbot_history.window("rss_mb", seconds)
+    probe = userbot_history.window("probe_ms", seconds)
+    conns = userbot_history.window("connections", seconds)
+    
+    lines = [f"📈 **History (last {format_window(seconds)}, {len(cpu)} samples):**"]
+    lines.append(f"💻 CPU avg {sum(cpu) / len(cpu):.1f}% / max {max(cpu):.1f}%")
+    lines.append(f"🧠 RSS now {rss[-1]:.1f} MB / max {max(rss):.1f} MB")
+    if probe:
+        lines.append(f"📡 Probe latency avg {sum(probe) / len(probe):.0f} ms / max {max(probe):.0f} ms")
+    else:
+        lines.append("📡 Probe latency: no successful probes")
+    if conns:
+        lines.append(f"🔌 Connections now {conns[-1]:.0f} / max {max(conns):.0f}")
+    served = userbot_history.window("served_kbps", seconds)
+    if served:
+        lines.append(f"📤 Served avg {sum(served) / len(served) / 1024:.2f} MB/s / max {max(served) / 1024:.2f} MB/s")
+    stats = latest_probe.get("stats") or {}
+    if stats.get("bytes_served") is not None:
+        lines.append(f"📦 Lifetime {stats['bytes_served'] / 1024 / 1024:.1f} MB in {stats.get('total_streams', 0)} streams")
+    return "\n".join(lines)
+
+def record_probe(latency: float, payload: dict):
+    """Keep a successful probe for the sampler, deriving the served rate since the previous one"""
+    now = time.monotonic()
+    stats = payload.get("stats") or {}
+    served = stats.get("process_bytes_served")
+    served_kbps = None
+    # The counter restarts with each process, so only compare probes of the same PID
+    if served is not None and latest_probe.get("pid") == payload.get("pid"):
+        previous = (latest_probe.get("stats") or {}).get("process_bytes_served")
+        if previous is not None and now > latest_probe["time"]:
+            served_kbps = (served - previous) / 1024 / (now - latest_probe["time"])
+    latest_probe.update(
+        time=now,
+        latency_ms=latency * 1000,
+        stats=stats,
+        pid=payload.get("pid"),
+        served_kbps=served_kbps,
+        fresh=True  # Not yet written into the history
+    )
+
+def record_startup_timings(payload: dict):
+    """Track the startup milestones each userbot launch reports on its probe endpoint"""
+    pid, timings = payload.get("pid"), payload.get("startup")
+    if pid is None or not timings:
+        return
+    if startup_history and startup_history[-1]["pid"] == pid:
+        startup_history[-1].update(timings)
+    else:
+        startup_history.append(dict(timings, pid=pid))
+
+def summarise_startup() -> str:
+    """Startup timings of the current launch plus the median over recent launches"""
+    if not startup_history:
+        return "🚀 **Startup:** not reported yet"
+    
+    latest = startup_history[-1]
+    labels = (
+        ("listening", "listening"),
+        ("telegram_connected", "Telegram"),
+        ("first_viewer", "first viewer")
+    )
+    parts = [f"{label} {latest[key]:.1f}s" for key, label in labels if key in latest]
+    line = "🚀 **Startup:** " + (" · ".join(parts) or "pending")
+    
+    # first_viewer depends on when someone starts watching, so only the connect gets a median
+    connected = sorted(entry["telegram_connected"] for entry in startup_history if "telegram_connected" in entry)
+    if len(connected) > 1:
+        line += f"\n   median time to Telegram over {len(connected)} launches: {connected[len(connected) // 2]:.1f}s"
+    return line
+
+def format_stats(seconds: float) -> str:
+    """Render min / p95 / max / now per metric over a window for /stats"""
+    rows = []
+    for field, label in METRIC_FIELDS:
+        values = userbot_history.window(field, seconds)
+        if not values:
+            continue
+        rows.append(
+            f"{label:<13}{min(values):>8.1f}{percentile(values, 95):>8.1f}"
+            f"{max(values):>8.1f}{values[-1]:>8.1f}"
+        )
+    if not rows:
+        return None
+    header = f"{'metric':<13}{'min':>8}{'p95':>8}{'max':>8}{'now':>8}"
+    return "\n".join([header] + rows)
+
+def evaluate_alerts() -> list[tuple[str, str]]:
+    """Check recent history against alert thresholds; returns (key, text) pairs"""
+    alerts = []
+    uptime = get_userbot_uptime()
+    
+    cpu = userbot_history.window("cpu", ALERT_CPU_SUSTAINED)
+    expected = ALERT_CPU_SUSTAINED / SAMPLE_INTERVAL
+    if uptime >= ALERT_CPU_SUSTAINED and len(cpu) >= 0.8 * expected and min(cpu) >= ALERT_CPU_PERCENT:
+        alerts.append(("cpu", f"🔥 CPU at or above {ALERT_CPU_PERCENT}% for {ALERT_CPU_SUSTAINED}s (now {cpu[-1]:.0f}%)"))
+    
+    rss_now = userbot_history.latest("rss_mb")
+    if rss_now is not None and rss_now >= ALERT_RSS_MB:
+        alerts.append(("rss", f"🧠 RSS is {rss_now:.0f} MB (threshold {ALERT_RSS_MB} MB)"))
+    
+    # Only compare against samples from the current process
+    rss = userbot_history.window("rss_mb", min(ALERT_RSS_GROWTH_WINDOW, uptime))
+    if rss and rss[-1] - min(rss) >= ALERT_RSS_GROWTH_MB:
+        alerts.append((
+            "rss_growth",
+            f"📈 RSS grew {rss[-1] - min(rss):.0f} MB in the last "
+            f"{format_window(min(ALERT_RSS_GROWTH_WINDOW, uptime))} (now {rss[-1]:.0f} MB) - possible leak"
+        ))
+    
+    # Loop lag is only recorded once per health probe, so look back one interval
+    recent_lag = userbot_history.window("loop_lag_ms", HEALTH_CHECK_INTERVAL)
+    lag = recent_lag[-1] if recent_lag else None
+    if lag is not None and lag >= ALERT_LOOP_LAG_MS:
+        alerts.append(("loop_lag", f"🐢 Userbot event loop lagging {lag:.0f} ms"))
+    
+    fds = userbot_history.latest("fds")
+    if fds is not None and fds >= ALERT_FDS:
+        alerts.append(("fds", f"📂 {fds:.0f} open file descriptors (threshold {ALERT_FDS})"))
+    return alerts
+
+async def check_alerts(bot):
+    """Push threshold alerts to the owner, at most once per cooldown per alert"""
+    now = time.monotonic()
+    for key, text in evaluate_alerts():
+        if now - alert_last_sent.get(key, -ALERT_COOLDOWN) < ALERT_COOLDOWN:
+            continue
+        alert_last_sent[key] = now
+        record_log_line(f"===== alert: {text} =====")
+        await notify_owner(bot, f"🚨 Userbot alert\n\n{text}")
+
+async def notify_owner(bot, text: str):
+    """Send a message to the owner, never raising"""
+    try:
+        await bot.send_message(chat_id=OWNER_ID, text=text)
+    except Exception as e:
+        print(f"⚠️ Failed to notify owner: {e}")
+
+async def start_userbot(handoff_from: int = None) -> tuple[bool, str]:
+    """Start the userbot script (as the successor of PID `handoff_from` for a hand-off)"""
+    global userbot_process, userbot_log_task, userbot_started_at
     
     # Check if already running
     if is_userbot_running():
@@ -60,16 +516,27 @@ async def start_userbot() -> tuple[bool, str]:
     
     # Start the process
     try:
-        userbot_logs = []
-        userbot_process = subprocess.Popen(
-            [sys.executable, USERBOT_SCRIPT],
+        # Unbuffered output so logs show up as soon as they are printed
+        env = dict(
+            os.environ,
+            PYTHONUNBUFFERED="1",
+            DRAIN_TIMEOUT=str(USERBOT_DRAIN_TIMEOUT),
+            USERBOT_LAUNCHED_AT=str(time.time())  # Lets the userbot time its own startup
+        )
+        if handoff_from is not None:
+            # The successor connects to Telegram only after this PID has exited
+            env["HANDOFF_FROM_PID"] = str(handoff_from)
+        userbot_process = await asyncio.create_subprocess_exec(
+            sys.executable, USERBOT_SCRIPT,
             stdout=subprocess.PIPE,
             stderr=subprocess.STDOUT,
             stdin=subprocess.PIPE,
-            text=True,
-            bufsize=1,
+            env=env,
             creationflags=subprocess.CREATE_NEW_PROCESS_GROUP if sys.platform == "win32" else 0
         )
+        userbot_started_at = time.monotonic()
+        record_log_line(f"===== userbot started (PID {userbot_process.pid}) =====")
+        userbot_log_task = asyncio.create_task(pump_userbot_output(userbot_process.stdout))
         
         # Wait a moment to check if it started successfully
         await asyncio.sleep(2)
@@ -82,8 +549,31 @@ async def start_userbot() -> tuple[bool, str]:
     except Exception as e:
         return False, f"❌ Failed to start userbot: {str(e)}"
 
-async def stop_userbot() -> tuple[bool, str]:
-    """Stop the userbot script gracefully"""
+async def terminate_process(process, timeout: float) -> bool:
+    """
+    Ask a userbot process to drain and exit, force-killing it after `timeout`.
+    Returns True if it exited on its own.
+    """
+    # Send SIGTERM for graceful shutdown (starts the userbot's drain mode)
+    if sys.platform == "win32":
+        # Windows: send Ctrl+C event
+        process.send_signal(signal.CTRL_C_EVENT)
+    else:
+        # Unix: send SIGTERM
+        process.send_signal(signal.SIGTERM)
+    
+    # Wait for graceful shutdown
+    try:
+        await asyncio.wait_for(process.wait(), timeout=timeout)
+        return True
+    except asyncio.TimeoutError:
+        # Force kill if graceful shutdown fails
+        process.kill()
+        await process.wait()
+        return False
+
+async def stop_userbot(timeout: float = USERBOT_DRAIN_TIMEOUT + USERBOT_STOP_TIMEOUT) -> tuple[bool, str]:
+    """Stop the userbot script gracefully, force-killing it after `timeout` seconds"""
     global userbot_process
     
     if not is_userbot_running():
@@ -91,30 +581,230 @@ async def stop_userbot() -> tuple[bool, str]:
     
     try:
         pid = userbot_process.pid
-        
-        # Send SIGTERM for graceful shutdown (works with your signal handlers)
-        if sys.platform == "win32":
-            # Windows: send Ctrl+C event
-            userbot_process.send_signal(signal.CTRL_C_EVENT)
-        else:
-            # Unix: send SIGTERM
-            userbot_process.send_signal(signal.SIGTERM)
-        
-        # Wait for graceful shutdown (max 10 seconds)
-        try:
-            userbot_process.wait(timeout=10)
-            userbot_process = None
+        graceful = await terminate_process(userbot_process, timeout)
+        userbot_process = None
+        if graceful:
             return True, f"✅ Userbot stopped gracefully!\n📍 PID: {pid}"
-        except subprocess.TimeoutExpired:
-            # Force kill if graceful shutdown fails
-            userbot_process.kill()
-            userbot_process.wait()
-            userbot_process = None
-            return True, f"⚠️ Userbot force-killed (didn't respond to graceful shutdown)\n📍 PID: {pid}"
+        return True, f"⚠️ Userbot force-killed (didn't respond to graceful shutdown)\n📍 PID: {pid}"
     
     except Exception as e:
         return False, f"❌ Failed to stop userbot: {str(e)}"
 
+async def wait_for_successor(pid: int) -> bool:
+    """Wait until the userbot with `pid` is listening and answering probes"""
+    deadline = time.monotonic() + HANDOFF_READY_TIMEOUT
+    while time.monotonic() < deadline:
+        if not is_userbot_running():
+            return False
+        _, _, payload = await probe_userbot_health()
+        # Old and new processes share the port, so only answers from the new one count.
+        # The successor only connects to Telegram once the old process has exited, so
+        # it answers "not ready" here and readiness is left to the supervisor.
+        if payload.get("pid") == pid:
+            return True
+        await asyncio.sleep(1)
+    return False
+
+async def drain_old_userbot(process):
+    """Let a handed-off userbot finish its active streams, then make sure it exits"""
+    draining_processes.add(process)
+    try:
+        graceful = await terminate_process(process, USERBOT_DRAIN_TIMEOUT + USERBOT_STOP_TIMEOUT)
+        outcome = "drained and exited" if graceful else "force-killed after drain timeout"
+        record_log_line(f"===== old userbot (PID {process.pid}) {outcome} =====")
+    except Exception as e:
+        record_log_line(f"===== failed to stop old userbot (PID {process.pid}): {e} =====")
+    finally:
+        draining_processes.discard(process)
+
+async def hand_off_userbot() -> tuple[bool, str]:
+    """
+    Rolling restart: launch a successor that binds the same port with
+    SO_REUSEPORT, wait until it is listening, then drain the old process.
+    The old process keeps serving its active streams; the successor only
+    connects to Telegram once the old one has exited, so the two never
+    share the session at the same time.
+    """
+    global userbot_process, userbot_log_task, userbot_started_at
+    
+    old_process, old_log_task, old_started_at = userbot_process, userbot_log_task, userbot_started_at
+    userbot_process = None
+    try:
+        success, message = await start_userbot(handoff_from=old_process.pid)
+        if success and not await wait_for_successor(userbot_process.pid):
+            success, message = False, "❌ New userbot did not start listening in time."
+    except asyncio.CancelledError:
+        # Cancelled by /off or shutdown: the old process must stay tracked somewhere,
+        # or it would keep the port and the Telegram session as an orphan
+        if is_userbot_running():
+            # The successor is up and waiting for it to exit, so let it drain
+            draining_processes.add(old_process)
+            asyncio.create_task(drain_old_userbot(old_process))
+        else:
+            userbot_process, userbot_log_task, userbot_started_at = old_process, old_log_task, old_started_at
+        raise
+    
+    if not success:
+        # Keep serving from the old process
+        if is_userbot_running():
+            await terminate_process(userbot_process, USERBOT_STOP_TIMEOUT)
+        userbot_process, userbot_log_task, userbot_started_at = old_process, old_log_task, old_started_at
+        return False, f"{message}\n↩️ Old userbot kept running (PID {old_process.pid})"
+    
+    asyncio.create_task(drain_old_userbot(old_process))
+    return True, (
+        f"✅ Hand-off started\n"
+        f"📍 New PID: {userbot_process.pid}\n"
+        f"🚰 Old PID {old_process.pid} keeps serving its active streams for up to {USERBOT_DRAIN_TIMEOUT}s.\n"
+        f"⏳ The new one connects to Telegram once the old one exits: until then, "
+        f"new streams and seeks wait instead of starting"
+    )
+
+async def restart_userbot(hung: bool = False) -> tuple[bool, str]:
+    """
+    Restart the userbot, overlapping old and new processes when the OS allows it.
+    A hung userbot can't drain or close its listener, so it is killed first.
+    """
+    global userbot_process
+    
+    if hung and is_userbot_running():
+        pid = userbot_process.pid
+        userbot_process.kill()
+        await userbot_process.wait()
+        userbot_process = None
+        record_log_line(f"===== hung userbot (PID {pid}) killed =====")
+        return await start_userbot()
+    
+    if is_userbot_running() and USERBOT_HANDOFF:
+        return await hand_off_userbot()
+    
+    # Stop if running, giving in-flight streams time to drain
+    if is_userbot_running():
+        success, message = await stop_userbot()
+        if not success:
+            return False, f"❌ Failed to stop: {message}"
+        await asyncio.sleep(2)
+    
+    return await start_userbot()
+
+# ===== SUPERVISOR =====
+async def restart_with_backoff(bot, reason: str):
+    """Restart a crashed or hung userbot after an exponential backoff delay"""
+    global restart_attempts, restart_count, last_restart
+    
+    delay = min(RESTART_BACKOFF_MAX, RESTART_BACKOFF_BASE * 2 ** restart_attempts)
+    restart_attempts += 1
+    record_log_line(f"===== supervisor: userbot {reason}, restarting in {delay}s =====")
+    await notify_owner(bot, f"⚠️ Userbot {reason}.\n🔄 Auto-restart in {delay}s (attempt {restart_attempts})")
+    await asyncio.sleep(delay)
+    if not supervisor_enabled:
+        return
+    
+    async with userbot_lock:
+        success, message = await restart_userbot(hung=reason.startswith("unresponsive"))
+    
+    if not success:
+        record_log_line(f"===== supervisor: restart attempt {restart_attempts} failed =====")
+        await notify_owner(bot, f"❌ Auto-restart attempt {restart_attempts} failed.\n{message}")
+        return
+    
+    restart_count += 1
+    last_restart = (time.time(), reason)
+    await notify_owner(bot, message)
+
+async def supervise_userbot(bot):
+    """Probe the userbot periodically, record metrics and restart it on crash or hang"""
+    global restart_attempts
+    failures = 0
+    
+    while supervisor_enabled:
+        await asyncio.sleep(HEALTH_CHECK_INTERVAL)
+        if not supervisor_enabled:
+            break
+        if userbot_lock.locked():
+            # A command is starting or stopping the userbot right now
+            continue
+        
+        try:
+            reason = None
+            if not is_userbot_running():
+                code = userbot_process.returncode if userbot_process else None
+                reason = f"crashed (exit code {code})"
+            else:
+                healthy, latency, payload = await probe_userbot_health()
+                if healthy:
+                    failures = 0
+                    record_probe(latency, payload)
+                    record_startup_timings(payload)
+                    if restart_attempts and get_userbot_uptime() > BACKOFF_RESET_AFTER:
+                        restart_attempts = 0
+                elif payload.get("draining"):
+                    # Shutting down on purpose: not ready, but not broken either
+                    pass
+                elif get_userbot_uptime() > HEALTH_STARTUP_GRACE:
+                    failures += 1
+                    if failures >= HEALTH_MAX_FAILURES:
+                        if payload:
+                            # The server answers, but Telegram never connected or dropped
+                            reason = f"not ready ({failures} failed readiness checks)"
+                        else:
+                            reason = f"unresponsive ({failures} failed health checks)"
+            
+            if reason is not None:
+                failures = 0
+                await restart_with_backoff(bot, reason)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"⚠️ Supervisor error: {e}")
+
+async def sample_userbot(bot):
+    """Record a resource sample every SAMPLE_INTERVAL seconds and raise alerts"""
+    while supervisor_enabled:
+        await asyncio.sleep(SAMPLE_INTERVAL)
+        if not is_userbot_running():
+            continue
+        
+        try:
+            sample = await asyncio.to_thread(sample_process_metrics)
+            if sample is None:
+                continue
+            # Userbot-side figures only exist once per health probe: record them
+            # in the first sample after it and leave them missing otherwise
+            if latest_probe.get("fresh"):
+                latest_probe["fresh"] = False
+                stats = latest_probe["stats"]
+                sample["probe_ms"] = latest_probe["latency_ms"]
+                sample["loop_lag_ms"] = stats.get("loop_lag_ms")
+                sample["active_streams"] = stats.get("active_streams")
+                sample["served_kbps"] = latest_probe["served_kbps"]
+            userbot_history.append(time.monotonic(), sample)
+            await check_alerts(bot)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"⚠️ Sampler error: {e}")
+
+def start_supervisor(bot):
+    """Enable auto-restart and make sure the supervisor and sampler tasks are running"""
+    global supervisor_task, sampler_task, supervisor_enabled
+    supervisor_enabled = True
+    if supervisor_task is None or supervisor_task.done():
+        supervisor_task = asyncio.create_task(supervise_userbot(bot))
+    if sampler_task is None or sampler_task.done():
+        sampler_task = asyncio.create_task(sample_userbot(bot))
+
+async def stop_supervisor():
+    """Disable auto-restart and wait for the supervisor and sampler tasks to finish"""
+    global supervisor_task, sampler_task, supervisor_enabled
+    supervisor_enabled = False
+    for task in (supervisor_task, sampler_task):
+        if task is not None and not task.done():
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+    supervisor_task = None
+    sampler_task = None
+
 # ===== COMMAND HANDLERS =====
 async def start_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle /start command"""
@@ -134,7 +824,8 @@ async def start_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
 /off - Stop the userbot
 /status - Check userbot status
 /restart - Restart the userbot
-/logs - View recent logs
+/logs [n] [pattern] - View recent logs (tail/grep)
+/stats [window] - Resource history, e.g. /stats 1h
 /info - Show process information
 
 🔒 **Security:** Only you can control this bot.
@@ -143,6 +834,7 @@ async def start_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
 async def on_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle /on command"""
+    global restart_attempts
     user_id = update.effective_user.id
     
     if not is_owner(user_id):
@@ -150,7 +842,11 @@ async def on_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
         return
     
     status_msg = await update.message.reply_text("🔄 Starting userbot...")
-    success, message = await start_userbot()
+    async with userbot_lock:
+        success, message = await start_userbot()
+    if success:
+        restart_attempts = 0
+        start_supervisor(context.bot)
     
     await status_msg.edit_text(message, parse_mode="Markdown")
     
@@ -175,8 +871,10 @@ async def off_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
         await update.message.reply_text("❌ Unauthorized.")
         return
     
-    status_msg = await update.message.reply_text("🔄 Stopping userbot...")
-    success, message = await stop_userbot()
+    status_msg = await update.message.reply_text("🔄 Stopping userbot (draining active streams)...")
+    await stop_supervisor()
+    async with userbot_lock:
+        success, message = await stop_userbot()
     
     await status_msg.edit_text(message, parse_mode="Markdown")
 
@@ -205,9 +903,17 @@ async def status_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
 🧠 **Memory:** {info['memory']}
 📊 **Status:** {info['status']}
 ⏱ **Uptime:** {info['uptime']}
+🛡 **Auto-restart:** {"ON" if supervisor_enabled else "OFF"} ({restart_count} restarts)
+
+{summarise_startup()}
+
+{summarise_metrics()}
 
 Use /off to stop the userbot.
 """
+        if last_restart:
+            restarted_at = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(last_restart[0]))
+            status_text += f"\n♻️ Last auto-restart: {restarted_at} ({last_restart[1]})"
     else:
         status_text = "🟡 **Userbot Status: UNKNOWN**\n\nProcess exists but cannot read info."
     
@@ -215,6 +921,7 @@ Use /off to stop the userbot.
 
 async def restart_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle /restart command"""
+    global restart_attempts
     user_id = update.effective_user.id
     
     if not is_owner(user_id):
@@ -223,43 +930,84 @@ async def restart_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     
     status_msg = await update.message.reply_text("🔄 Restarting userbot...")
     
-    # Stop if running
-    if is_userbot_running():
-        success, message = await stop_userbot()
-        if not success:
-            await status_msg.edit_text(f"❌ Failed to stop: {message}")
-            return
-        await asyncio.sleep(2)
+    async with userbot_lock:
+        success, message = await restart_userbot()
     
-    # Start again
-    success, message = await start_userbot()
+    if success:
+        restart_attempts = 0
+        start_supervisor(context.bot)
     await status_msg.edit_text(f"🔄 **Restart Complete**\n\n{message}", parse_mode="Markdown")
 
 async def logs_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    """Handle /logs command"""
+    """Handle /logs command: /logs [lines] [pattern]"""
     user_id = update.effective_user.id
     
     if not is_owner(user_id):
         await update.message.reply_text("❌ Unauthorized.")
         return
     
-    if not is_userbot_running():
-        await update.message.reply_text("❌ Userbot is not running. No logs available.")
+    # Parse optional line count and grep pattern
+    args = list(context.args or [])
+    count = LOG_TAIL_DEFAULT
+    if args and args[0].isdigit():
+        count = min(int(args.pop(0)), MAX_LOG_LINES)
+    pattern = " ".join(args) or None
+    
+    lines = get_recent_logs(count, pattern)
+    if not lines:
+        if pattern:
+            await update.message.reply_text(f"📋 No log lines match: {pattern}")
+        else:
+            await update.message.reply_text("📋 No logs captured yet. Use /on to start the userbot.")
         return
     
-    # Read recent output from process
+    header = f"📋 Last {len(lines)} log lines"
+    if pattern:
+        header += f" matching '{pattern}'"
+    if is_userbot_running():
+        header += f" (PID {userbot_process.pid})"
+    
+    # Keep the newest lines that fit in a single Telegram message
+    body = "\n".join(lines)
+    budget = TELEGRAM_MAX_MESSAGE - len(header) - 2
+    if len(body) > budget:
+        body = "…" + body[-(budget - 1):]
+    
     try:
-        # Note: This is a simple implementation. For production, consider using a proper logging system
-        await update.message.reply_text(
-            "📋 **Recent Logs:**\n\n"
-            "Logs are printed to console where user_bot.py is running.\n"
-            "Check the terminal/console for detailed logs.\n\n"
-            f"🆔 Process PID: `{userbot_process.pid}`",
-            parse_mode="Markdown"
-        )
+        # Sent as plain text: log output may contain Markdown control characters
+        await update.message.reply_text(f"{header}\n\n{body}")
     except Exception as e:
         await update.message.reply_text(f"❌ Error reading logs: {str(e)}")
 
+async def stats_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Handle /stats command: /stats [window], e.g. /stats 90s, /stats 15m, /stats 2h"""
+    user_id = update.effective_user.id
+    
+    if not is_owner(user_id):
+        await update.message.reply_text("❌ Unauthorized.")
+        return
+    
+    seconds = STATS_DEFAULT_WINDOW
+    if context.args:
+        seconds = parse_window(context.args[0])
+        if not seconds:
+            await update.message.reply_text("❌ Invalid window. Examples: /stats 90s, /stats 15m, /stats 2h")
+            return
+    seconds = min(seconds, METRICS_HISTORY_SECONDS)
+    
+    table = format_stats(seconds)
+    if table is None:
+        await update.message.reply_text("📊 No samples recorded yet. Use /on to start the userbot.")
+        return
+    
+    samples = len(userbot_history.window_indices(seconds))
+    await update.message.reply_text(
+        f"📊 **Userbot stats - last {format_window(seconds)}** ({samples} samples)\n"
+        f"```\n{table}\n```\n"
+        f"💾 History buffer: {userbot_history.nbytes / 1024:.0f} KB",
+        parse_mode="Markdown"
+    )
+
 async def info_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle /info command"""
     user_id = update.effective_user.id
@@ -291,10 +1039,23 @@ async def cleanup():
     """Cleanup before bot exits"""
     global userbot_process
     
+    await stop_supervisor()
     if is_userbot_running():
         print("\n🧹 Cleaning up: Stopping userbot...")
         await stop_userbot()
         print("✅ Userbot stopped.")
+    
+    # Old userbots still draining after a hand-off: stop waiting for them
+    for process in list(draining_processes):
+        if process.returncode is None:
+            await terminate_process(process, USERBOT_STOP_TIMEOUT)
+    
+    if userbot_log_task is not None and not userbot_log_task.done():
+        userbot_log_task.cancel()
+
+async def post_shutdown(application: Application):
+    """Stop the userbot on the control bot's own event loop before it closes"""
+    await cleanup()
 
 # ===== MAIN =====
 def main():
@@ -318,7 +1079,7 @@ def main():
     print("\n" + "=" * 60 + "\n")
     
     # Create application
-    application = Application.builder().token(BOT_TOKEN).build()
+    application = Application.builder().token(BOT_TOKEN).post_shutdown(post_shutdown).build()
     
     # Add command handlers
     application.add_handler(CommandHandler("start", start_command))
@@ -327,6 +1088,7 @@ def main():
     application.add_handler(CommandHandler("status", status_command))
     application.add_handler(CommandHandler("restart", restart_command))
     application.add_handler(CommandHandler("logs", logs_command))
+    application.add_handler(CommandHandler("stats", stats_command))
     application.add_handler(CommandHandler("info", info_command))
     
     # Run the bot
@@ -334,12 +1096,9 @@ def main():
         application.run_polling(allowed_updates=Update.ALL_TYPES)
     except KeyboardInterrupt:
         print("\n\n🛑 Shutting down control bot...")
-        # Cleanup will be handled by the cleanup function
-        asyncio.run(cleanup())
         print("👋 Goodbye!")
     except Exception as e:
         print(f"\n❌ Error: {e}")
-        asyncio.run(cleanup())
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
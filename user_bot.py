@@ -1,14 +1,21 @@
 import asyncio
+import functools
+import gzip
+import hashlib
+import importlib
+import importlib.util
+import json
 import re
-import signal
+import socket
+import time
 from fastapi import FastAPI, Request, HTTPException
-from fastapi.responses import StreamingResponse, JSONResponse, HTMLResponse
+from fastapi.responses import StreamingResponse, JSONResponse, HTMLResponse, Response
 from fastapi.middleware.cors import CORSMiddleware
-from telethon import TelegramClient, events
-from telethon.tl.types import Message
-import uvicorn
 import os
 
+# Telethon and uvicorn are imported lazily (see start_bot / create_server)
+# so the HTTP server is up and answering /ready as early as possible.
+
 # ===== CONFIGURATION =====
 # Telethon automatically uses TgCrypto if installed - no code changes needed!
 API_ID = int(os.getenv("API_ID", "22557209"))
@@ -32,9 +39,50 @@ def get_base_url():
 BASE_URL = get_base_url()
 PORT = int(os.getenv("PORT", "8000"))
 
+# Graceful drain: seconds active streams get to finish after SIGTERM
+DRAIN_TIMEOUT = float(os.getenv("DRAIN_TIMEOUT", "30"))
+# Set by main.py for a hand-off launch: PID of the userbot being replaced
+HANDOFF_FROM_PID = int(os.getenv("HANDOFF_FROM_PID", "0"))
+# Let a successor process bind the same port while this one drains
+REUSE_PORT = hasattr(socket, "SO_REUSEPORT") and os.getenv("REUSE_PORT", "1") == "1"
+# Stream counters survive restarts through this file
+STATE_FILE = os.getenv("STATE_FILE", "stream_state.json")
+# Seconds a request waits for the Telegram client to connect before a 503
+READY_WAIT_TIMEOUT = float(os.getenv("READY_WAIT_TIMEOUT", "15"))
+# Hand-off: seconds to wait for the predecessor to exit (main.py force-kills it
+# 10s after its drain timeout, so this only trips if something is badly wrong)
+PREDECESSOR_TIMEOUT = float(os.getenv("PREDECESSOR_TIMEOUT", str(DRAIN_TIMEOUT + 20)))
+# A successor only connects once its predecessor has drained, so requests that
+# reach it meanwhile wait out the drain instead of failing after READY_WAIT_TIMEOUT
+CLIENT_WAIT_TIMEOUT = READY_WAIT_TIMEOUT + (PREDECESSOR_TIMEOUT if HANDOFF_FROM_PID else 0)
+# Launch time passed by main.py, so timings include interpreter startup
+PROCESS_STARTED_AT = float(os.getenv("USERBOT_LAUNCHED_AT") or time.time())
+
+# ===== STARTUP TIMING & CAPABILITIES =====
+startup_timings = {}  # Milestone -> seconds since process launch
+
+def record_startup(milestone: str):
+    """Record the first time a startup milestone is reached"""
+    if milestone not in startup_timings:
+        startup_timings[milestone] = round(time.time() - PROCESS_STARTED_AT, 3)
+        print(f"⏱ Startup: {milestone} after {startup_timings[milestone]:.2f}s")
+
+@functools.lru_cache(maxsize=None)
+def detect_capabilities() -> dict:
+    """Detect optional speed-ups once (find_spec checks without importing)"""
+    return {
+        name: importlib.util.find_spec(name) is not None
+        for name in ("tgcrypto", "cryptg", "uvloop", "httptools", "brotli")
+    }
+
+def has_tgcrypto() -> bool:
+    return detect_capabilities()["tgcrypto"]
+
 # ===== INITIALIZE =====
 app = FastAPI(title="Telegram File Streamer - Ultra Fast Edition")
-client = TelegramClient(SESSION_NAME, API_ID, API_HASH)
+client = None  # TelegramClient, created by start_bot()
+client_ready = None  # Future resolved once the client is connected
+bot_task = None
 
 # Enable CORS
 app.add_middleware(
@@ -43,22 +91,182 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Let a cross-origin player read the total size when fetching ranges itself
+    expose_headers=["Content-Range", "Content-Length", "Accept-Ranges"],
 )
 
+# ===== STREAM STATISTICS =====
+# Exposed on "/" so the control bot's health probe can track throughput
+stream_stats = {
+    "active_streams": 0,
+    "total_streams": 0,
+    "bytes_served": 0,
+    "process_bytes_served": 0,  # Not persisted: lets the probe derive a rate
+    "loop_lag_ms": 0.0,
+}
+LOOP_LAG_INTERVAL = 0.25  # Seconds between event-loop lag measurements
+
+async def monitor_loop_lag():
+    """
+    Measure how late the event loop wakes from a short sleep.
+    Keeps a decaying peak so spikes are still visible to a slower probe.
+    """
+    loop = asyncio.get_running_loop()
+    while True:
+        started = loop.time()
+        await asyncio.sleep(LOOP_LAG_INTERVAL)
+        lag_ms = max(0.0, (loop.time() - started - LOOP_LAG_INTERVAL) * 1000)
+        stream_stats["loop_lag_ms"] = round(max(lag_ms, stream_stats["loop_lag_ms"] * 0.9), 1)
+
 # ===== SHUTDOWN HANDLER =====
-shutdown_flag = asyncio.Event()
+shutdown_flag = asyncio.Event()  # Set on the first SIGINT/SIGTERM: drain mode
+http_server = None  # Draining uvicorn server when run as a script
+server_loop = None
 
 def signal_handler(signum, frame):
-    print("\n\n🛑 Shutdown signal received. Cleaning up...")
-    shutdown_flag.set()
+    print("\n\n🛑 Shutdown signal received. Draining active streams...")
+    if server_loop is not None:
+        server_loop.call_soon_threadsafe(shutdown_flag.set)
+    else:
+        shutdown_flag.set()
 
-signal.signal(signal.SIGINT, signal_handler)
-signal.signal(signal.SIGTERM, signal_handler)
+def create_server():
+    """
+    Build a uvicorn server whose first SIGINT/SIGTERM starts drain mode
+    instead of tearing down every connection. A second signal exits
+    immediately.
+    """
+    import uvicorn
+    
+    class DrainingServer(uvicorn.Server):
+        def handle_exit(self, sig, frame):
+            if shutdown_flag.is_set():
+                return super().handle_exit(sig, frame)
+            signal_handler(sig, frame)
+    
+    config = uvicorn.Config(
+        app,
+        log_level="info",
+        # After our own drain, give leftover connections a short grace
+        timeout_graceful_shutdown=5
+    )
+    return DrainingServer(config)
+
+def create_listen_socket() -> socket.socket:
+    """
+    Bind the HTTP port ourselves so SO_REUSEPORT can be set for hand-offs.
+    Every userbot sets the option (a successor can only join a port whose
+    current owner has it), but only a hand-off launch may share the port:
+    a normal launch first checks it is free, so a leftover userbot makes
+    startup fail with EADDRINUSE instead of silently splitting traffic.
+    """
+    if REUSE_PORT and not HANDOFF_FROM_PID:
+        probe = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        try:
+            probe.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            probe.bind(("0.0.0.0", PORT))
+        finally:
+            probe.close()
+    
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    if REUSE_PORT:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+    sock.bind(("0.0.0.0", PORT))
+    return sock
+
+state_loaded = False  # Only the process that has loaded the state may write it
+
+def load_state():
+    """
+    Add the persisted stream counters to our own. Called once this process
+    is in charge (after a hand-off predecessor has exited and saved), so
+    nothing the predecessor counted during its drain is lost.
+    """
+    global state_loaded
+    try:
+        with open(STATE_FILE, "r", encoding="utf-8") as f:
+            state = json.load(f)
+        for key in ("total_streams", "bytes_served"):
+            stream_stats[key] += int(state.get(key, 0))
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        print(f"⚠️ Could not load {STATE_FILE}: {e}")
+    state_loaded = True
+
+def save_state():
+    """Persist stream counters and flush Telethon's session (entity cache)"""
+    if not state_loaded:
+        # Never took over from the predecessor: its file is still the truth
+        return
+    try:
+        tmp_path = f"{STATE_FILE}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({key: stream_stats[key] for key in ("total_streams", "bytes_served")}, f)
+        os.replace(tmp_path, STATE_FILE)
+    except Exception as e:
+        print(f"⚠️ Could not save {STATE_FILE}: {e}")
+    try:
+        if client is not None:
+            client.session.save()
+    except Exception as e:
+        print(f"⚠️ Could not save session: {e}")
+
+async def drain_on_shutdown(server):
+    """
+    Drain mode: stop listening (a successor bound with SO_REUSEPORT now
+    receives all new connections), refuse new /stream requests on existing
+    keep-alive connections, and wait for active streams up to DRAIN_TIMEOUT.
+    """
+    await shutdown_flag.wait()
+    for listener in server.servers:
+        listener.close()
+    
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + DRAIN_TIMEOUT
+    while stream_stats["active_streams"] > 0 and loop.time() < deadline:
+        await asyncio.sleep(0.5)
+    
+    if stream_stats["active_streams"] > 0:
+        print(f"⏱ Drain timeout: cutting {stream_stats['active_streams']} remaining stream(s)")
+    else:
+        print("✅ All streams drained")
+    save_state()
+    server.should_exit = True
 
 # ===== HELPER FUNCTIONS =====
-async def get_message(chat_id: int, message_id: int) -> Message:
+def is_client_ready() -> bool:
+    return (
+        client_ready is not None
+        and client_ready.done()
+        and not client_ready.cancelled()
+        and client_ready.exception() is None
+        and client.is_connected()
+    )
+
+async def get_client():
+    """
+    Readiness gate: wait briefly for the Telegram client to connect instead
+    of failing requests that arrive during startup.
+    """
+    if client_ready is None:
+        raise HTTPException(status_code=503, detail="Server is starting", headers={"Retry-After": "2"})
     try:
-        message = await client.get_messages(chat_id, ids=message_id)
+        return await asyncio.wait_for(asyncio.shield(client_ready), timeout=CLIENT_WAIT_TIMEOUT)
+    except asyncio.TimeoutError:
+        raise HTTPException(
+            status_code=503,
+            detail="Telegram client is still connecting, retry shortly",
+            headers={"Retry-After": "2"}
+        )
+    except Exception as e:
+        raise HTTPException(status_code=503, detail=f"Telegram client failed to start: {e}")
+
+async def get_message(chat_id: int, message_id: int):
+    tg = await get_client()
+    try:
+        message = await tg.get_messages(chat_id, ids=message_id)
         if not message or not message.media:
             raise HTTPException(status_code=404, detail="Message or media not found")
         return message
@@ -80,21 +288,42 @@ def parse_range_header(range_header: str, file_size: int) -> tuple:
 # ===== API ENDPOINTS =====
 @app.get("/")
 async def root():
-    # Check if TgCrypto is available
-    try:
-        import tgcrypto
+    if has_tgcrypto():
         crypto_status = "⚡ TgCrypto Enabled - Ultra Fast Mode"
-    except ImportError:
+    else:
         crypto_status = "⚠️ TgCrypto Not Installed (Install for 10x speed)"
+    connected = client is not None and client.is_connected()
     
     return {
         "status": "🚀 Telegram Stream Server Running",
-        "bot": "✅ Connected" if client.is_connected() else "❌ Disconnected",
+        "bot": "✅ Connected" if connected else "❌ Disconnected",
         "server_url": BASE_URL,
         "performance": crypto_status,
-        "environment": os.getenv("KOYEB_DEPLOYMENT_ID", "local")
+        "environment": os.getenv("KOYEB_DEPLOYMENT_ID", "local"),
+        "pid": os.getpid(),
+        "connected": connected,
+        "draining": shutdown_flag.is_set(),
+        "startup": startup_timings,
+        "stats": stream_stats
     }
 
+@app.get("/ready")
+async def ready():
+    """Readiness probe: 200 once Telegram is connected and the server isn't draining"""
+    is_ready = is_client_ready() and not shutdown_flag.is_set()
+    return JSONResponse(
+        {
+            "ready": is_ready,
+            "connected": is_client_ready(),
+            "draining": shutdown_flag.is_set(),
+            "pid": os.getpid(),
+            "startup": startup_timings,
+            "capabilities": detect_capabilities(),
+            "stats": stream_stats
+        },
+        status_code=200 if is_ready else 503
+    )
+
 @app.get("/info/{chat_id}/{message_id}")
 async def get_file_info(chat_id: int, message_id: int):
     message = await get_message(chat_id, message_id)
@@ -127,6 +356,14 @@ async def stream_file(chat_id: int, message_id: int, request: Request):
     Ultra-fast streaming with TgCrypto support.
     Telethon automatically uses TgCrypto if it's installed - 10x faster!
     """
+    if shutdown_flag.is_set():
+        # Draining: send the client to a fresh connection (the successor)
+        raise HTTPException(
+            status_code=503,
+            detail="Server is restarting, retry shortly",
+            headers={"Retry-After": "1", "Connection": "close"}
+        )
+    
     message = await get_message(chat_id, message_id)
     media = message.media
     
@@ -157,6 +394,8 @@ async def stream_file(chat_id: int, message_id: int, request: Request):
         chunk_size = 1024 * 1024  # 1MB chunks - optimal with TgCrypto
         offset = start
         remaining = content_length
+        stream_stats["active_streams"] += 1
+        stream_stats["total_streams"] += 1
         
         try:
             # Telethon automatically uses TgCrypto if installed
@@ -177,8 +416,11 @@ async def stream_file(chat_id: int, message_id: int, request: Request):
                 if chunk_len > remaining:
                     chunk = chunk[:remaining]
                 
+                record_startup("first_viewer")
                 yield chunk
                 remaining -= len(chunk)
+                stream_stats["bytes_served"] += len(chunk)
+                stream_stats["process_bytes_served"] += len(chunk)
                 
                 if remaining <= 0:
                     break
@@ -186,6 +428,8 @@ async def stream_file(chat_id: int, message_id: int, request: Request):
         except Exception as e:
             print(f"⚠️ Streaming error: {e}")
             raise
+        finally:
+            stream_stats["active_streams"] -= 1
 
     headers = {
         "Content-Type": mime_type,
@@ -209,15 +453,106 @@ async def stream_file(chat_id: int, message_id: int, request: Request):
         media_type=mime_type
     )
 
+PLAYER_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "player2.html")
+PLAYER_RECHECK_INTERVAL = 5  # Seconds between checks for an edited player2.html
+player_cache = {}  # Precompressed player page: mtime, etag, bodies, checked_at
+
+def build_player_cache() -> dict:
+    """Read player2.html (or the built-in fallback) and precompress it once"""
+    try:
+        mtime = os.path.getmtime(PLAYER_PATH)
+        with open(PLAYER_PATH, "rb") as f:
+            raw = f.read()
+    except OSError:
+        mtime, raw = None, get_basic_player().encode("utf-8")
+    
+    bodies = {"identity": raw, "gzip": gzip.compress(raw, compresslevel=9)}
+    if detect_capabilities()["brotli"]:
+        import brotli
+        bodies["br"] = brotli.compress(raw, quality=11)
+    digest = hashlib.sha1(raw).hexdigest()[:16]
+    return {
+        "mtime": mtime,
+        # Each encoding is a different representation, so each gets its own ETag
+        "etags": {
+            encoding: f'"{digest}"' if encoding == "identity" else f'"{digest}-{encoding}"'
+            for encoding in bodies
+        },
+        "bodies": bodies,
+        "checked_at": time.monotonic()
+    }
+
+async def get_player_cache() -> dict:
+    """Cached player page, rebuilt off the event loop when the file changes"""
+    global player_cache
+    if player_cache and time.monotonic() - player_cache["checked_at"] < PLAYER_RECHECK_INTERVAL:
+        return player_cache
+    try:
+        mtime = await asyncio.to_thread(os.path.getmtime, PLAYER_PATH)
+    except OSError:
+        mtime = None
+    if not player_cache or mtime != player_cache["mtime"]:
+        player_cache = await asyncio.to_thread(build_player_cache)
+    else:
+        player_cache["checked_at"] = time.monotonic()
+    return player_cache
+
+def choose_encoding(accept_encoding: str, available) -> str:
+    """
+    Pick the best of `available` for an Accept-Encoding header, honouring
+    q-values (q=0 rules a coding out) and '*'. Ties prefer the order of
+    `available`; identity is the fallback when nothing else is acceptable.
+    """
+    qualities = {}
+    for entry in accept_encoding.lower().split(","):
+        coding, *params = [part.strip() for part in entry.split(";")]
+        if not coding:
+            continue
+        q = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        qualities[coding] = q
+    
+    best, best_q = "identity", 0.0
+    for encoding in available:
+        # identity is acceptable unless excluded, but any listed coding beats it
+        default = 0.001 if encoding == "identity" else 0.0
+        q = qualities.get(encoding, qualities.get("*", default))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """If-None-Match check: '*' or any listed tag equal to `etag` (weak comparison)"""
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag == "*" or tag.removeprefix("W/") == etag:
+            return True
+    return False
+
 @app.get("/player")
 async def serve_player(request: Request):
-    player_path = os.path.join(os.path.dirname(__file__), "player2.html")
-    if not os.path.exists(player_path):
-        return HTMLResponse(content=get_basic_player())
+    cache = await get_player_cache()
+    encoding = choose_encoding(
+        request.headers.get("accept-encoding", ""),
+        [name for name in ("br", "gzip", "identity") if name in cache["bodies"]]
+    )
+    headers = {
+        "ETag": cache["etags"][encoding],
+        "Cache-Control": "no-cache",  # Always revalidate; a match costs a 304
+        "Vary": "Accept-Encoding",
+    }
+    if etag_matches(request.headers.get("if-none-match", ""), cache["etags"][encoding]):
+        return Response(status_code=304, headers=headers)
     
-    with open(player_path, "r", encoding="utf-8") as f:
-        html_content = f.read()
-    return HTMLResponse(content=html_content)
+    if encoding != "identity":
+        headers["Content-Encoding"] = encoding
+    return HTMLResponse(content=cache["bodies"][encoding], headers=headers)
 
 def get_basic_player():
     return """
@@ -291,7 +626,7 @@ def get_basic_player():
     """
 
 # ===== TELEGRAM EVENT HANDLERS =====
-@client.on(events.NewMessage(pattern=r'^/stream$'))
+# Registered on the client in start_bot()
 async def handle_stream_command(event):
     if not event.is_reply:
         await event.reply("❌ Please reply to a video or document with /stream")
@@ -325,10 +660,9 @@ async def handle_stream_command(event):
         file_info = "📄 **Type:** Media file"
 
     # Check if TgCrypto is enabled
-    try:
-        import tgcrypto
+    if has_tgcrypto():
         perf_note = "⚡ **Ultra-Fast Mode:** TgCrypto enabled - Zero buffering!"
-    except ImportError:
+    else:
         perf_note = "💡 **Tip:** Install TgCrypto (`pip install tgcrypto`) for 10x faster streaming"
 
     response = f"""✅ **Stream Link Generated!**
@@ -350,12 +684,10 @@ async def handle_stream_command(event):
     
     await event.reply(response, link_preview=False)
 
-@client.on(events.NewMessage(pattern=r'^/start$'))
 async def handle_start(event):
-    try:
-        import tgcrypto
+    if has_tgcrypto():
         perf_status = "⚡ Ultra-Fast Mode (TgCrypto Enabled)"
-    except ImportError:
+    else:
         perf_status = "📦 Standard Mode (Install TgCrypto for 10x speed)"
     
     await event.reply(f"""👋 **Welcome to Telegram File Streamer!**
@@ -375,19 +707,55 @@ async def handle_start(event):
 """)
 
 # ===== STARTUP =====
+async def wait_for_predecessor():
+    """
+    Hand-off: the old userbot keeps its Telegram connection while it drains.
+    Connect only after it has exited, so the session file and its auth key
+    are never used by two processes at once (SQLite locks, AUTH_KEY_DUPLICATED).
+    Requests meanwhile wait on the readiness gate.
+    """
+    if not HANDOFF_FROM_PID:
+        return
+    print(f"⏳ Waiting for previous userbot (PID {HANDOFF_FROM_PID}) to finish draining...")
+    deadline = time.monotonic() + PREDECESSOR_TIMEOUT
+    while time.monotonic() < deadline:
+        try:
+            os.kill(HANDOFF_FROM_PID, 0)
+        except ProcessLookupError:
+            return
+        except PermissionError:
+            pass  # Exists but owned by someone else
+        await asyncio.sleep(0.2)
+    # Connecting now would share the session with a live process
+    raise TimeoutError(f"previous userbot (PID {HANDOFF_FROM_PID}) still running after {PREDECESSOR_TIMEOUT:.0f}s")
+
 async def start_bot():
+    global client
     print("🚀 Starting Telegram client...")
-    await client.start(phone=PHONE)
+    try:
+        await wait_for_predecessor()
+        load_state()
+        # Import Telethon in a thread so the event loop keeps serving meanwhile
+        telethon = await asyncio.to_thread(importlib.import_module, "telethon")
+        client = telethon.TelegramClient(SESSION_NAME, API_ID, API_HASH)
+        client.add_event_handler(handle_stream_command, telethon.events.NewMessage(pattern=r'^/stream$'))
+        client.add_event_handler(handle_start, telethon.events.NewMessage(pattern=r'^/start$'))
+        await client.start(phone=PHONE)
+    except Exception as e:
+        print(f"❌ Telegram client failed to start: {e}")
+        client_ready.set_exception(e)
+        return
+    client_ready.set_result(client)
+    record_startup("telegram_connected")
     print("✅ Telegram client connected!")
     
     # Check if TgCrypto is available
-    try:
-        import tgcrypto
+    if has_tgcrypto():
         print("⚡ TgCrypto detected! Ultra-fast streaming enabled!")
         print("   → 10x faster encryption/decryption")
         print("   → Hardware-accelerated (AES-NI)")
         print("   → Zero buffering experience")
-    except ImportError:
+    else:
         print("⚠️  TgCrypto not installed - using standard mode")
         print("💡 For 10x faster streaming, run:")
         print("   pip install tgcrypto")
@@ -399,12 +767,24 @@ async def start_bot():
 
 @app.on_event("startup")
 async def startup_handler():
-    asyncio.create_task(start_bot())
+    global server_loop, client_ready, bot_task
+    server_loop = asyncio.get_running_loop()
+    client_ready = server_loop.create_future()
+    record_startup("listening")
+    if http_server is not None:
+        asyncio.create_task(drain_on_shutdown(http_server))
+    asyncio.create_task(monitor_loop_lag())
+    bot_task = asyncio.create_task(start_bot())
 
 @app.on_event("shutdown")
 async def shutdown_handler():
-    print("🧹 Disconnecting Telegram client...")
-    await client.disconnect()
+    if not shutdown_flag.is_set():
+        save_state()
+    if bot_task is not None and not bot_task.done():
+        bot_task.cancel()
+    if client is not None:
+        print("🧹 Disconnecting Telegram client...")
+        await client.disconnect()
     print("✅ Cleanup complete!")
 
 # ===== RUN SERVER =====
@@ -416,10 +796,9 @@ if __name__ == "__main__":
     print(f"🔌 Port: {PORT}")
     
     # Check TgCrypto
-    try:
-        import tgcrypto
+    if has_tgcrypto():
         print("⚡ Performance: Ultra-Fast Mode (TgCrypto)")
-    except ImportError:
+    else:
         print("📦 Performance: Standard Mode")
         print("💡 Install TgCrypto for 10x speed: pip install tgcrypto")
     
@@ -430,7 +809,8 @@ if __name__ == "__main__":
     print("=" * 70 + "\n")
     
     try:
-        uvicorn.run(app, host="0.0.0.0", port=PORT, log_level="info")
+        http_server = create_server()
+        http_server.run(sockets=[create_listen_socket()])
     except KeyboardInterrupt:
         print("\n👋 Goodbye!")
     finally: